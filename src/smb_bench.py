@@ -15,14 +15,56 @@ import os
 import time
 import shutil
 import argparse
+import asyncio
 import uuid
 import json
+import errno
+import hashlib
+import mmap
+import multiprocessing
 import random
 import re
 import socket
+import statistics
+import subprocess
+import tarfile
+import threading
+import sys
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+from concurrent.futures import ThreadPoolExecutor, wait, ALL_COMPLETED
 from pathlib import Path
 from datetime import datetime
 
+try:
+    import aiofiles  # Optional: native async file API for the asyncio small file backend
+except ImportError:
+    aiofiles = None
+
+try:
+    import liburing  # Optional (Linux 5.6+): batched io_uring submission for the small file backend
+except ImportError:
+    liburing = None
+
+try:
+    import orjson  # Optional: C-coded JSON encoder for the reports
+except ImportError:
+    orjson = None
+
+try:
+    import smbclient  # Optional (smbprotocol): user-space SMB2/3 client for --smb-direct
+    import smbclient.shutil
+except ImportError:
+    smbclient = None
+
+try:
+    import numpy as np  # Optional: much faster non-cryptographic payload generation
+    _RNG = np.random.default_rng()
+except ImportError:
+    _RNG = None
+
 def _extract_server_from_path(path_str):
     """Extract server hostname from a UNC path (e.g. \\\\server\\share or //server/share)."""
     match = re.match(r'^[/\\]{2}([^/\\]+)', str(path_str))
@@ -30,6 +72,547 @@ def _extract_server_from_path(path_str):
         return match.group(1)
     return None
 
+def _smb_unc(url):
+    """Normalises an smb://server/share/path or //server/share/path URL to a UNC path (\\\\server\\share\\path)."""
+    path = re.sub(r'^smb:', '', str(url), flags=re.IGNORECASE)
+    parts = [p for p in re.split(r'[/\\]+', path) if p]
+    if len(parts) < 2:
+        raise ValueError(f"Expected smb://server/share[/path], got {url!r}")
+    return '\\\\' + '\\'.join(parts)
+
+def _is_smb_path(path):
+    """True for the UNC path strings used by --smb-direct (mounted paths are always Path objects)."""
+    return isinstance(path, str) and path.startswith('\\\\')
+
+def _probe_mount_opts(path):
+    """Returns the SMB client settings relevant to wire I/O size for the mount holding path, or None.
+
+    Linux: fstype/options (incl. rsize/wsize) from /proc/mounts. macOS: the `mount` entry.
+    Windows: the I/O related fields of Get-SmbClientConfiguration.
+    """
+    try:
+        if os.name == 'nt':
+            fields = "EnableLargeMtu,EnableMultiChannel,EnableBandwidthThrottling,MaxCmds,WindowSizeThreshold,ConnectionCountPerRssNetworkInterface"
+            out = subprocess.run(
+                ["powershell", "-NoProfile", "-Command",
+                 f"Get-SmbClientConfiguration | Select-Object {fields} | ConvertTo-Json"],
+                capture_output=True, text=True, timeout=15, check=True).stdout
+            return {"source": "Get-SmbClientConfiguration", **json.loads(out)}
+
+        if sys.platform.startswith('linux'):
+            with open('/proc/mounts') as f:
+                mounts = [line.split()[:4] for line in f]
+            # /proc/mounts escapes spaces in mount points as \040
+            mounts = [(dev, mnt.replace('\\040', ' '), fstype, opts) for dev, mnt, fstype, opts in mounts]
+        else:
+            out = subprocess.run(["mount"], capture_output=True, text=True, timeout=15, check=True).stdout
+            mounts = []
+            for line in out.splitlines():
+                match = re.match(r'^(.+?) on (.+?) \((\w+),? ?(.*)\)$', line)
+                if match:
+                    mounts.append(match.groups())
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+    # The mount holding path is the longest mount point that prefixes it
+    real = os.path.realpath(path)
+    best = None
+    for dev, mnt, fstype, opts in mounts:
+        if (real == mnt or real.startswith(mnt.rstrip('/') + '/')) and (best is None or len(mnt) > len(best[1])):
+            best = (dev, mnt, fstype, opts)
+    if best is None:
+        return None
+
+    dev, mnt, fstype, opts = best
+    info = {"source": "mounts", "device": dev, "mount_point": mnt, "fstype": fstype, "options": opts}
+    for opt in re.split(r',\s*', opts):
+        key, _, value = opt.partition('=')
+        if key in ('rsize', 'wsize', 'vers', 'max_channels') and value:
+            info[key] = int(value) if value.isdigit() else value
+        elif key == 'multichannel':
+            info[key] = True  # A bare flag in the mount options
+    return info
+
+def _random_bytes(size, secure=False):
+    """Returns incompressible filler bytes. Uses numpy's PRNG when available unless secure is set."""
+    if _RNG is not None and not secure:
+        return _RNG.bytes(size)
+    return os.urandom(size)
+
+# os.open flags for creating/truncating a file for raw writes (O_BINARY stops Windows translating newlines)
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+
+def _preallocate(fd, size):
+    """Reserves size bytes of extents for fd with Linux fallocate(2); a no-op where it is unavailable.
+
+    Not os.posix_fallocate: on filesystems without fallocate, glibc emulates it by writing a byte to
+    every block, which would double the I/O of generating the file. fallocate(2) just fails there.
+    """
+    if not sys.platform.startswith('linux'):
+        return False
+    import ctypes
+    libc = ctypes.CDLL(None, use_errno=True)
+    fallocate = getattr(libc, 'fallocate64', None) or libc.fallocate
+    fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+    return fallocate(fd, 0, 0, size) == 0
+
+def _write_all(fd, data):
+    """Writes all of data to fd. A single write normally suffices; this loops in case it is short."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+def _write_new_file(path, data):
+    """Creates (or truncates) path and writes data with raw os calls, skipping Python's file object layer."""
+    fd = os.open(path, _WRITE_FLAGS, 0o644)
+    try:
+        _write_all(fd, data)
+    finally:
+        os.close(fd)
+
+_gen_pool = None  # Per-process random pool for --parallel-gen workers
+
+def _init_gen_worker(pool_bytes):
+    """multiprocessing initializer: hands each generator process the parent's random pool."""
+    global _gen_pool
+    _gen_pool = memoryview(pool_bytes)
+
+def _generate_file_worker(job):
+    """Writes one small file from the process's pool. job is (path, size, offset)."""
+    path, size, off = job
+    _write_new_file(path, _gen_pool[off:off + size])
+
+# Decimal places for each transfer metric in the saved report (see _calculate_metrics)
+_METRIC_DIGITS = {"seconds": 3, "mbps": 2, "MB_s": 2, "MiB_s": 2, "files_sec": 1}
+
+def _round_metrics(data):
+    """Returns a copy of a results dict with every transfer metric rounded for the report."""
+    if isinstance(data, dict):
+        return {k: round(v, _METRIC_DIGITS[k]) if k in _METRIC_DIGITS and isinstance(v, float) else _round_metrics(v)
+                for k, v in data.items()}
+    if isinstance(data, list):
+        return [_round_metrics(v) for v in data]
+    return data
+
+def _write_json(path, data, compact=False):
+    """Writes data as JSON, either compact or pretty-printed with a 2-space indent."""
+    if orjson is not None:
+        # Encode to bytes in C and hand them to the OS in one write
+        Path(path).write_bytes(orjson.dumps(data, option=0 if compact else orjson.OPT_INDENT_2))
+        return
+    # json.dump issues many small writes; a 64 KiB buffer turns them into a few large ones
+    with open(path, 'w', buffering=1 << 16) as f:
+        if compact:
+            json.dump(data, f, separators=(',', ':'))
+        else:
+            json.dump(data, f, indent=2)
+
+def _scan_bin_files(directory):
+    """Lists (name, size) for each .bin file in a single directory pass, using scandir's cached stat."""
+    with os.scandir(directory) as it:
+        return [(e.name, e.stat().st_size) for e in it if e.name.endswith('.bin') and e.is_file()]
+
+# Default copy buffer: large enough for each read/write to span a full multi-credit SMB2 transfer (8 MiB)
+_COPY_BUFSIZE = 8 * 1024 * 1024
+
+def _copy_data(src, dst, buf, nocache=False, hasher=None, direct=False, src_dir_fd=None, dst_dir_fd=None):
+    """Copies only the file data from src to dst through the caller's buffer. No metadata is copied.
+
+    If hasher is given, every chunk is fed to it in the same pass, so verification costs no extra I/O.
+    src/dst are resolved relative to src_dir_fd/dst_dir_fd when given (see _open_dir).
+    With direct, src is read (and on Linux dst written) around the OS cache (buf must then be
+    page-aligned, e.g. an mmap); if the filesystem refuses, that side falls back to nocache.
+    """
+    mv = memoryview(buf)
+    fsrc = fdst = None
+    write = None
+    if direct:
+        try:
+            fsrc = _open_direct(src)
+        except OSError:
+            nocache = True
+        try:
+            fdst = _open_direct(dst, write=True)
+            write = lambda view: _write_direct(fdst, view)
+        except OSError:
+            nocache = True
+    if fsrc is None:
+        fsrc = open(src, 'rb', buffering=0, opener=_dir_opener(src_dir_fd))
+    if fdst is None:
+        fdst = open(dst, 'wb', buffering=0, opener=_dir_opener(dst_dir_fd))
+    write = write or fdst.write
+    # Unbuffered files: readinto fills our buffer directly and writes go straight to the OS
+    with fsrc, fdst:
+        if nocache:
+            _set_nocache(fsrc, fdst)
+        while True:
+            n = fsrc.readinto(buf)
+            if not n:
+                break
+            view = mv[:n]
+            if hasher is not None:
+                hasher.update(view)
+            while view:  # Raw writes may be short
+                view = view[write(view):]
+
+def _open_dir(path):
+    """Opens path as a directory fd for dir_fd-relative opens, or returns None where unsupported (Windows)."""
+    if os.open not in os.supports_dir_fd or not hasattr(os, 'O_DIRECTORY'):
+        return None
+    return os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+
+def _dir_opener(dir_fd):
+    """Returns an open() opener that resolves names relative to dir_fd (None means the usual lookup)."""
+    if dir_fd is None:
+        return None
+    return lambda path, flags: os.open(path, flags, 0o666, dir_fd=dir_fd)
+
+def _open_direct(path, write=False):
+    """Opens path for unbuffered reading that bypasses the OS cache (O_DIRECT / FILE_FLAG_NO_BUFFERING).
+
+    Reads need a page-aligned buffer sized in whole sectors. Raises OSError where unsupported.
+    With write, path is created/truncated for writing instead (Linux only, see _write_direct).
+    """
+    if write:
+        if os.name == 'nt' or not hasattr(os, 'O_DIRECT'):
+            raise OSError(f"Direct writes are not supported on {sys.platform}")
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_DIRECT, 0o644)
+        return open(fd, 'wb', buffering=0)
+    if os.name == 'nt':
+        import ctypes
+        import msvcrt
+        create_file = ctypes.windll.kernel32.CreateFileW
+        create_file.restype = ctypes.c_void_p
+        # GENERIC_READ, FILE_SHARE_READ, OPEN_EXISTING, FILE_FLAG_NO_BUFFERING | FILE_FLAG_SEQUENTIAL_SCAN
+        handle = create_file(str(path), 0x80000000, 0x1, None, 3, 0x20000000 | 0x08000000, None)
+        if handle is None or handle == ctypes.c_void_p(-1).value:
+            raise ctypes.WinError()
+        fd = msvcrt.open_osfhandle(handle, os.O_RDONLY)
+    elif hasattr(os, 'O_DIRECT'):
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECT)
+    else:
+        raise OSError(f"Direct I/O is not supported on {sys.platform}")
+    return open(fd, 'rb', buffering=0)
+
+# O_DIRECT writes must be whole logical blocks; 4 KiB covers both 512e and 4Kn devices
+_DIRECT_ALIGN = 4096
+
+def _write_direct(f, view):
+    """Writes view to a file opened by _open_direct(write=True), returning the bytes written.
+
+    O_DIRECT only accepts whole-block writes, so an unaligned tail (or a filesystem that rejects
+    direct writes with EINVAL) clears O_DIRECT on the descriptor and the rest is written buffered.
+    """
+    flags = fcntl.fcntl(f.fileno(), fcntl.F_GETFL)
+    if flags & os.O_DIRECT and len(view) % _DIRECT_ALIGN == 0:
+        try:
+            return f.write(view)
+        except OSError as e:
+            if e.errno != errno.EINVAL:
+                raise
+    if flags & os.O_DIRECT:
+        fcntl.fcntl(f.fileno(), fcntl.F_SETFL, flags & ~os.O_DIRECT)
+    return f.write(view)
+
+def _set_nocache(*files):
+    """Disables caching on the given open files or descriptors where the platform supports it (macOS F_NOCACHE)."""
+    if fcntl is not None and hasattr(fcntl, 'F_NOCACHE'):
+        for f in files:
+            fcntl.fcntl(f, fcntl.F_NOCACHE, 1)
+
+def _flush_file(path):
+    """Writes back a single file's dirty data (what os.sync() did for it) but leaves it cached."""
+    # Windows' FlushFileBuffers needs a handle with write access
+    fd = os.open(path, os.O_RDWR | os.O_BINARY if os.name == 'nt' else os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _evict_file(path):
+    """Writes back and drops the cached pages of a single file, instead of a system-wide os.sync().
+
+    Returns True if the cached pages were dropped (on macOS the file is only flushed).
+    """
+    if os.name == 'nt':
+        try:
+            # Opening a non-cached handle makes the cache manager flush and purge the file
+            _open_direct(path).close()
+            return True
+        except OSError:
+            return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)  # Dirty pages can't be dropped until they are written back
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            return True
+        return False
+    finally:
+        os.close(fd)
+
+def _latency_percentiles(times_ns):
+    """Summarizes per-file copy times (ns) as P50/P95/P99/P99.9 in milliseconds."""
+    if len(times_ns) < 2:
+        cuts = times_ns * 999
+    else:
+        cuts = statistics.quantiles(times_ns, n=1000, method='inclusive')
+    return {
+        "p50": round(cuts[499] / 1e6, 3),
+        "p95": round(cuts[949] / 1e6, 3),
+        "p99": round(cuts[989] / 1e6, 3),
+        "p999": round(cuts[998] / 1e6, 3),
+    }
+
+def _unlink_all(paths, workers=32):
+    """Unlinks the given files in parallel, to overlap per-file round trips on SMB."""
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        list(ex.map(os.unlink, paths))
+
+def _fast_rmtree(path, workers=32):
+    """Removes a directory tree, unlinking files in parallel to overlap per-file round trips on SMB."""
+    files, dirs = [], []
+    stack = [os.fspath(path)]
+    while stack:
+        current = stack.pop()
+        dirs.append(current)
+        with os.scandir(current) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    files.append(entry.path)
+
+    _unlink_all(files, workers)
+
+    # Parents were listed before their children, so remove in reverse order
+    for d in reversed(dirs):
+        os.rmdir(d)
+
+def _fastcopy(src, dst, bufsize=_COPY_BUFSIZE, nocache=False, buf=None, hasher=None, metadata=True, direct=False):
+    """Copies src to dst through a reusable buffer (allocated if not given), preserving timestamps like copy2
+    unless metadata is False."""
+    _copy_data(src, dst, buf if buf is not None else bytearray(bufsize), nocache, hasher, direct)
+    if not metadata:
+        return
+    src_stat = os.stat(src)
+    os.utime(dst, (src_stat.st_atime, src_stat.st_mtime))
+
+def _platform_fastcopy(src, dst, bufsize=_COPY_BUFSIZE, nocache=False, metadata=True):
+    """Copies src to dst with the platform's kernel-side copy, falling back to _fastcopy on failure.
+
+    Linux tries copy_file_range before sendfile; macOS uses fcopyfile; Windows uses CopyFileExW.
+
+    With metadata=False the trailing timestamp copy (an extra SMB set-info round trip) is skipped;
+    CopyFileExW always carries timestamps as part of the copy.
+    """
+    try:
+        if os.name == 'nt':
+            import ctypes
+            # CopyFileExW keeps the data path inside the Windows SMB redirector (server-side copy offload where supported)
+            if not ctypes.windll.kernel32.CopyFileExW(str(src), str(dst), None, None, None, 0):
+                raise ctypes.WinError()
+            return
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            if nocache:
+                _set_nocache(fsrc, fdst)
+            if sys.platform == 'darwin':
+                import posix
+                shutil._fastcopy_fcopyfile(fsrc, fdst, posix._COPYFILE_DATA)
+            else:
+                infd, outfd = fsrc.fileno(), fdst.fileno()
+                offset = 0
+                done = False
+                if hasattr(os, 'copy_file_range'):
+                    # Fully in-kernel; between two CIFS mounts this can become a server-side copy
+                    try:
+                        while True:
+                            copied = os.copy_file_range(infd, outfd, 1 << 30)
+                            if not copied:
+                                break
+                            offset += copied
+                        done = True
+                    except OSError:
+                        if offset:
+                            raise  # Partial copy: let the outer fallback redo the whole file
+                while not done:
+                    # Zero-copy from the page cache to the destination; large counts keep the syscall count low
+                    sent = os.sendfile(outfd, infd, offset, 1 << 30)
+                    if not sent:
+                        break
+                    offset += sent
+    except (OSError, AttributeError, getattr(shutil, '_GiveupOnFastCopy', OSError)):
+        _fastcopy(src, dst, bufsize, nocache, metadata=metadata)
+        return
+    if not metadata:
+        return
+    src_stat = os.stat(src)
+    os.utime(dst, (src_stat.st_atime, src_stat.st_mtime))
+
+def _parallel_copy(src, dst, part_size, workers, bufsize=_COPY_BUFSIZE, executor=None, get_buffer=None,
+                   nocache=False):
+    """Copies src to dst as fixed-size parts from a thread pool, keeping several SMB reads/writes in flight.
+
+    Uses positional I/O (preadv/pwrite) on one pair of descriptors where available; elsewhere (Windows)
+    each part opens its own handles and seeks. No metadata is copied. Pass a long-lived executor and a
+    get_buffer returning the calling thread's reusable buffer to keep worker buffers across copies.
+    nocache applies _set_nocache to the descriptors, as in _copy_data.
+    """
+    size = os.path.getsize(src)
+    with open(dst, 'wb') as f:
+        f.truncate(size)  # Pre-size so parts can land in any order
+    parts = [(off, min(part_size, size - off)) for off in range(0, size, part_size)]
+    local = threading.local()
+    if get_buffer is None:
+        def get_buffer():
+            buf = getattr(local, 'buf', None)
+            if buf is None:
+                buf = local.buf = bytearray(bufsize)
+            return buf
+    positional = hasattr(os, 'preadv') and hasattr(os, 'pwrite')
+    src_fd = os.open(src, os.O_RDONLY | getattr(os, 'O_BINARY', 0)) if positional else None
+    dst_fd = os.open(dst, os.O_WRONLY | getattr(os, 'O_BINARY', 0)) if positional else None
+    if positional and nocache:
+        _set_nocache(src_fd, dst_fd)
+
+    def copy_part(part):
+        off, length = part
+        buf = get_buffer()
+        mv = memoryview(buf)
+        bufsize = min(len(buf), part_size)
+        end = off + length
+        if positional:
+            while off < end:
+                n = os.preadv(src_fd, [mv[:min(bufsize, end - off)]], off)
+                if not n:
+                    raise OSError(f"Unexpected end of file reading {src} at offset {off}")
+                view = mv[:n]
+                while view:  # pwrite may be short
+                    written = os.pwrite(dst_fd, view, off)
+                    off += written
+                    view = view[written:]
+        else:
+            with open(src, 'rb', buffering=0) as fsrc, open(dst, 'r+b', buffering=0) as fdst:
+                if nocache:
+                    _set_nocache(fsrc, fdst)
+                fsrc.seek(off)
+                fdst.seek(off)
+                while off < end:
+                    n = fsrc.readinto(mv[:min(bufsize, end - off)])
+                    if not n:
+                        raise OSError(f"Unexpected end of file reading {src} at offset {off}")
+                    view = mv[:n]
+                    while view:
+                        view = view[fdst.write(view):]
+                    off += n
+
+    try:
+        if executor is not None:
+            list(executor.map(copy_part, parts))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                list(ex.map(copy_part, parts))
+    finally:
+        for fd in (src_fd, dst_fd):
+            if fd is not None:
+                os.close(fd)
+
+def _smb_copy(src, dst, part_size, workers, bufsize=_COPY_BUFSIZE, executor=None, get_buffer=None, hasher=None,
+              smb_kwargs=None):
+    """Copies between a local file and an --smb-direct UNC path with smbprotocol, bypassing the CIFS mount.
+
+    As in _parallel_copy, each part_size part is copied by a worker with its own SMB handle, so several
+    READ/WRITE requests are in flight on the shared connection; smbprotocol sizes each request from the
+    negotiated maximum and the credits granted. With a hasher, or a single worker, the file is copied in
+    order through one handle pair.
+    smb_kwargs, if given, is called in each worker for extra smbclient arguments (e.g. its own connection_cache).
+    """
+    extra = lambda: smb_kwargs() if smb_kwargs is not None else {}
+    upload = _is_smb_path(dst)
+    size = os.stat(src).st_size if upload else smbclient.stat(src, **extra()).st_size
+    local_open = lambda path, mode: open(path, mode, buffering=0)
+    smb_open = lambda path, mode: smbclient.open_file(path, mode, buffering=0, share_access='rw', **extra())
+    open_src, open_dst = (local_open, smb_open) if upload else (smb_open, local_open)
+    with open_dst(dst, 'wb') as f:
+        f.truncate(size)  # Sized up front so the parts can be written in any order
+    if hasher is not None or workers == 1:
+        part_size, workers = max(size, 1), 1  # One part: no CREATE/CLOSE per part inside the timed copy
+
+    def copy_part(start):
+        buf = get_buffer() if get_buffer is not None else bytearray(bufsize)
+        mv = memoryview(buf)[:min(len(buf), part_size)]
+        off, end = start, min(start + part_size, size)
+        with open_src(src, 'rb') as fsrc, open_dst(dst, 'r+b') as fdst:
+            fsrc.seek(off)
+            fdst.seek(off)
+            while off < end:
+                n = fsrc.readinto(mv[:end - off])  # May be short: bounded by the SMB credits available
+                if not n:
+                    raise OSError(f"Unexpected end of file reading {src} at offset {off}")
+                view = mv[:n]
+                if hasher is not None:
+                    hasher.update(view)
+                while view:
+                    view = view[fdst.write(view):]
+                off += n
+
+    parts = range(0, size, part_size)
+    if workers == 1:
+        for start in parts:
+            copy_part(start)
+    elif executor is not None:
+        list(executor.map(copy_part, parts))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            list(ex.map(copy_part, parts))
+
+def _kernel_copy(src, dst):
+    """Copies src to dst entirely in the kernel with copy_file_range (reflinks on CoW filesystems).
+
+    Returns the name of the method used, falling back to _platform_fastcopy where unavailable
+    (no copy_file_range, or it fails with EXDEV/ENOSYS/EOPNOTSUPP/EINVAL before copying anything).
+    """
+    if not hasattr(os, 'copy_file_range'):
+        _platform_fastcopy(src, dst)
+        return "platform"
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        infd, outfd = fsrc.fileno(), fdst.fileno()
+        size = remaining = os.fstat(infd).st_size
+        while remaining > 0:
+            try:
+                copied = os.copy_file_range(infd, outfd, remaining)
+            except OSError:
+                if remaining != size:
+                    raise
+                break  # Nothing copied yet: fall back below
+            if not copied:
+                break
+            remaining -= copied
+    if remaining == size and size:
+        _platform_fastcopy(src, dst)
+        return "platform"
+    return "copy_file_range"
+
+def _native_copy_tree(src_dir, dst_dir, threads=1, metadata=True):
+    """Copies the contents of src_dir into dst_dir with the OS copy tool in one subprocess.
+
+    robocopy on Windows (multithreaded with /MT), cp elsewhere. Returns elapsed nanoseconds
+    for the subprocess only, so Python's per-file overhead is not part of the time.
+    """
+    if os.name == 'nt':
+        # /COPY:D copies data only; the default DAT also copies attributes and timestamps
+        cmd = ['robocopy', str(src_dir), str(dst_dir), '/E', f'/MT:{max(1, min(threads, 128))}',
+               '/R:0', '/W:0', '/NP', '/NFL', '/NDL', '/NJH', '/NJS'] + ([] if metadata else ['/COPY:D'])
+    else:
+        cmd = ['cp', '-a' if metadata else '-R', f"{src_dir}{os.sep}.", str(dst_dir)]
+    start_ns = time.perf_counter_ns()
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    elapsed_ns = time.perf_counter_ns() - start_ns
+    # robocopy exit codes below 8 mean success (bit flags for copied/extra/mismatched files)
+    if proc.returncode >= (8 if os.name == 'nt' else 1):
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=proc.stderr)
+    return elapsed_ns
+
 class SMBBenchmarker:
     """
     Basic SMB Benchmarking Tool
@@ -40,7 +623,27 @@ class SMBBenchmarker:
                  small_min_kb=10,
                  small_max_kb=100,
                  no_generation=False,
-                 batch_suffix=""):
+                 batch_suffix="",
+                 copy_bufsize_kb=_COPY_BUFSIZE // 1024,
+                 secure_random=False,
+                 small_concurrency=32,
+                 compare_concurrency=False,
+                 copy_method="native",
+                 no_cache=False,
+                 compact_json=False,
+                 small_backend="threads",
+                 verify=False,
+                 preserve_metadata=False,
+                 direct=False,
+                 parallel_gen=False,
+                 large_parallel=1,
+                 part_size_mb=16,
+                 use_native_copy=False,
+                 smb_direct=None,
+                 smb_user=None,
+                 smb_pass=None,
+                 multichannel=False,
+                 warmup=False):
         """
         Docstring for __init__
 
@@ -60,12 +663,55 @@ class SMBBenchmarker:
         self.test_name = test_name
         self.batch_suffix = batch_suffix
         self.no_generation = no_generation
+        self.secure_random = secure_random
 
         # Config
         self.large_size = large_file_size_mb * 1024 * 1024
         self.small_count = small_file_count
         self.small_min_size = small_min_kb * 1024
         self.small_max_size = small_max_kb * 1024
+        self.copy_bufsize = copy_bufsize_kb * 1024
+        self.copy_method = copy_method
+        self.no_cache = no_cache
+        self.compact_json = compact_json
+        self.small_concurrency = small_concurrency
+        self.compare_concurrency = compare_concurrency
+        if small_backend == "io_uring" and liburing is None:
+            print("[WARN] liburing is not installed; using the threads backend for the small file test.")
+            small_backend = "threads"
+        elif small_backend == "io_uring":
+            # Probe the ring now so the small file test's thread pool is built if the kernel refuses it
+            ring = liburing.Ring()
+            try:
+                liburing.io_uring_queue_init(2, ring)
+            except OSError as e:
+                print(f"[WARN] io_uring unavailable ({e}); using the threads backend for the small file test.")
+                small_backend = "threads"
+            else:
+                liburing.io_uring_queue_exit(ring)
+        self.small_backend = small_backend
+        self.verify = verify
+        self.preserve_metadata = preserve_metadata
+        self.direct = direct
+        self.parallel_gen = parallel_gen
+        self.large_parallel = large_parallel
+        self.part_size = part_size_mb * 1024 * 1024
+        self.use_native_copy = use_native_copy
+        # --smb-direct: large file copies go through smbprotocol to this UNC directory instead of the mount
+        self.smb_remote = None
+        self.multichannel = multichannel
+        self.warmup = warmup
+        self._smb_creds = (smb_user, smb_pass)
+        self._smb_local = threading.local()
+        self._smb_caches = []
+        if smb_direct:
+            unc = _smb_unc(smb_direct)
+            self.smb_remote = f"{unc}\\smb_bench_target_{test_name}"
+            try:
+                smbclient.register_session(_extract_server_from_path(unc), username=smb_user, password=smb_pass)
+                smbclient.makedirs(self.smb_remote, exist_ok=True)
+            except Exception as e:  # smbprotocol's auth/negotiate errors are not OSErrors
+                raise OSError(f"--smb-direct: cannot use {unc}: {e}") from e
 
         self.results = {
             "test_name": test_name,
@@ -76,6 +722,20 @@ class SMBBenchmarker:
                 "small_files_count": small_file_count,
                 "small_min_kb": small_min_kb,
                 "small_max_kb": small_max_kb,
+                "copy_method": copy_method,
+                "copy_bufsize_kb": copy_bufsize_kb,
+                "large_parallel": large_parallel,
+                "part_size_mb": part_size_mb,
+                "no_cache": no_cache,
+                "preserve_metadata": preserve_metadata,
+                "direct": direct,
+                "small_concurrency": small_concurrency,
+                "small_native_copy": use_native_copy,
+                "smb_direct": _smb_unc(smb_direct) if smb_direct else None,
+                "multichannel": multichannel,
+                "warmup": warmup,
+                "small_backend": small_backend if small_backend != "asyncio" or aiofiles is not None else "asyncio (executor)",
+                "random_source": "numpy" if _RNG is not None and not secure_random else "os.urandom",
                 "total_small_files_mb": 0  # To be calculated
             },
             "latency": {},
@@ -86,38 +746,67 @@ class SMBBenchmarker:
         # Directories
         self.local_staging = self.source / "smb_bench_staging"
         self.remote_staging = self.target / f"smb_bench_target_{test_name}"
+        self.remote_small_dir = self.remote_staging / "small_files_remote"
         self.report_dir = self.source / "smb_bench_reports"
 
         # Prepare Local Dirs
         self.local_staging.mkdir(parents=True, exist_ok=True)
         self.report_dir.mkdir(parents=True, exist_ok=True)
 
+        # Prepare the whole remote tree in one call (each mkdir is a round trip on SMB)
+        self.remote_small_dir.mkdir(parents=True, exist_ok=True)
+
+        # Copy buffers are allocated once per thread and reused for every file
+        self._thread_bufs = threading.local()
+
+        # (name, size) of each small file, filled in by setup_small_files so the test doesn't re-list
+        self.small_entries = None
+        self._rand_pool = None
+        self._large_pool = None  # Thread pool for --large-parallel, created on first use
+
+    def _random_pool(self):
+        """Returns the run's shared random buffer, generated on first use.
+
+        Large and small file generation both slice this one buffer, so setup draws random data once.
+        """
+        if self._rand_pool is None:
+            size = max(1024 * 1024, self.small_max_size * 4)
+            self._rand_pool = memoryview(_random_bytes(size, self.secure_random))
+        return self._rand_pool
+
     def _generate_file(self, path, size_bytes):
-        """Generates a file with random data. Optimized for speed."""
+        """Generates a file with random (non-cryptographic by default) data. Optimized for speed."""
         chunk_size = 1024 * 1024  # 1MB chunk
-        with open(path, 'wb') as f:
-            chunk = os.urandom(min(size_bytes, chunk_size))
-            written = 0
-            while written < size_bytes:
-                bytes_to_write = min(size_bytes - written, len(chunk))
-                f.write(chunk[:bytes_to_write])
-                written += bytes_to_write
-
-    def _calculate_metrics(self, bytes_transferred, time_seconds, file_count=1):
-        """Calculates performance metrics for the given transfer."""
-        if time_seconds == 0: return {}
-
-        mb_per_sec = (bytes_transferred / 1_000_000) / time_seconds
-        mib_per_sec = (bytes_transferred / 1_048_576) / time_seconds
-        mbps = (bytes_transferred * 8) / 1_000_000 / time_seconds
-        files_per_sec = file_count / time_seconds
+        chunk = self._random_pool()[:chunk_size]
+        full_chunks, tail = divmod(size_bytes, len(chunk))
+        # Raw fd: we already write in large blocks, so skip both the BufferedWriter copy and the file object
+        fd = os.open(path, _WRITE_FLAGS, 0o644)
+        try:
+            _preallocate(fd, size_bytes)  # Reserve the extents up front (less fragmentation)
+            for _ in range(full_chunks):
+                _write_all(fd, chunk)
+            if tail:
+                _write_all(fd, chunk[:tail])
+        finally:
+            os.close(fd)
+
+    def _calculate_metrics(self, bytes_transferred, duration_ns, file_count=1):
+        """Calculates performance metrics for a transfer that took duration_ns nanoseconds.
+
+        Values are left unrounded; they are rounded only for display and in the saved report (_round_metrics).
+        """
+        if duration_ns == 0: return {}
+
+        time_seconds = duration_ns / 1e9
+        inv_t = 1.0 / time_seconds  # One division; everything below is a multiply
+        bytes_per_sec = bytes_transferred * inv_t
 
         return {
-            "seconds": round(time_seconds, 3),
-            "mbps": round(mbps, 2),
-            "MB_s": round(mb_per_sec, 2),
-            "MiB_s": round(mib_per_sec, 2),
-            "files_sec": round(files_per_sec, 1)
+            "seconds": time_seconds,
+            "mbps": bytes_per_sec * 8e-6,
+            "MB_s": bytes_per_sec * 1e-6,
+            "MiB_s": bytes_per_sec * (1 / 1_048_576),
+            "files_sec": file_count * inv_t
         }
 
     def measure_latency(self, server, port=445, count=5, interval=1.0):
@@ -127,9 +816,9 @@ class SMBBenchmarker:
 
         for i in range(count):
             try:
-                start = time.perf_counter()
+                start_ns = time.perf_counter_ns()
                 with socket.create_connection((server, port), timeout=5):
-                    elapsed = (time.perf_counter() - start) * 1000  # ms
+                    elapsed = (time.perf_counter_ns() - start_ns) / 1e6  # ms
                 times.append(elapsed)
                 print(f"  Ping {i+1}/{count}: {elapsed:.2f} ms")
             except Exception as e:
@@ -159,14 +848,38 @@ class SMBBenchmarker:
         self.results["latency"] = result
         return result
 
+    def probe_mount_info(self):
+        """Records the SMB client mount settings (rsize/wsize etc.) for the target in the report."""
+        info = _probe_mount_opts(self.target)
+        if info:
+            self.results['mount_info'] = info
+            if 'rsize' in info or 'wsize' in info:
+                print(f"[INFO] Target mount: {info['fstype']} rsize={info.get('rsize', '?')} wsize={info.get('wsize', '?')}")
+        if self.multichannel and self.smb_remote is None:
+            # Without --smb-direct the channels are the OS client's business; only report whether it will use them
+            if info and (info.get('multichannel') or info.get('EnableMultiChannel')):
+                print(f"[INFO] Target mount has multichannel enabled (max_channels={info.get('max_channels', '?')}).")
+            else:
+                print("[WARN] --multichannel: the target mount does not use SMB multichannel "
+                      "(Linux: mount with -o multichannel,max_channels=N; Windows: Set-SmbClientConfiguration -EnableMultiChannel $true).")
+        return info
+
     def setup_large_file(self):
         """Sets up the large test file."""
         fpath = self.local_staging / "large_test_file.bin"
+        # Written only once generation completes, so it also tells a finished file from an interrupted one
+        # (the file is preallocated to full size before any data is written)
+        marker = fpath.with_name(fpath.name + ".ok")
+        # One stat answers both "does it exist" and "what size is it"
+        try:
+            st = fpath.stat()
+            actual_size = st.st_size
+        except FileNotFoundError:
+            st = actual_size = None
 
         # CASE 1: No Generation Mode
         if self.no_generation:
-            if fpath.exists():
-                actual_size = fpath.stat().st_size
+            if actual_size is not None:
                 print(f"[INFO] No-Gen Mode: Using existing large file ({actual_size/1024/1024:.2f} MB)")
                 # Update Config to reflect reality
                 self.large_size = actual_size
@@ -177,19 +890,27 @@ class SMBBenchmarker:
                 return None
 
         # CASE 2: Normal Mode
-        if fpath.exists() and fpath.stat().st_size == self.large_size:
+        try:
+            known_good = st is not None and json.loads(marker.read_text()) == {
+                "size": self.large_size, "mtime_ns": st.st_mtime_ns}
+        except (OSError, ValueError):
+            known_good = False
+        if known_good:
             print(f"[INFO] Using existing large file: {fpath}")
         else:
             print(f"[SETUP] Generating {self.large_size/1024/1024:.2f} MB large file...")
+            marker.unlink(missing_ok=True)
             self._generate_file(fpath, self.large_size)
+            marker.write_text(json.dumps({"size": self.large_size, "mtime_ns": fpath.stat().st_mtime_ns}))
         return fpath
 
     def setup_small_files(self):
         """Sets up the small test files."""
         small_dir = self.local_staging / "small_files"
         small_dir.mkdir(exist_ok=True)
+        cfg = self.results['config']
 
-        existing = list(small_dir.glob("*.bin"))
+        existing = _scan_bin_files(small_dir)
 
         # CASE 1: No Generation Mode
         if self.no_generation:
@@ -197,63 +918,235 @@ class SMBBenchmarker:
                 print(f"[INFO] No-Gen Mode: Using {len(existing)} existing small files.")
 
                 # Calculate real stats
-                sizes = [f.stat().st_size for f in existing]
+                sizes = [size for _, size in existing]
                 total_size = sum(sizes)
                 min_size = min(sizes)
                 max_size = max(sizes)
 
                 # Update Config to reflect reality
                 self.small_count = len(existing)
-                self.results['config']['small_files_count'] = self.small_count
-                self.results['config']['small_min_kb'] = round(min_size / 1024, 2)
-                self.results['config']['small_max_kb'] = round(max_size / 1024, 2)
-                self.results['config']['total_small_files_mb'] = round(total_size / 1024 / 1024, 2)
+                cfg['small_files_count'] = self.small_count
+                cfg['small_min_kb'] = round(min_size / 1024, 2)
+                cfg['small_max_kb'] = round(max_size / 1024, 2)
+                cfg['total_small_files_mb'] = round(total_size / 1024 / 1024, 2)
 
                 print(f"       -> Total Size: {total_size/1024/1024:.2f} MB")
+                self.small_entries = existing
                 return small_dir
             else:
                 print(f"[ERROR] No-Gen Mode enabled but no .bin files found in {small_dir}")
                 return None
 
         # CASE 2: Normal Mode
-        # If count matches, reuse. If not, regenerate.
-        if len(existing) == self.small_count:
+        # Keep small_0..small_{count-1} where they exist with a size in range; generate only the rest
+        n, min_s, max_s = self.small_count, self.small_min_size, self.small_max_size
+        wanted = [f"small_{i}.bin" for i in range(n)]
+        wanted_set = set(wanted)
+        have = {name: size for name, size in existing if name in wanted_set and min_s <= size <= max_s}
+        surplus = [name for name, _ in existing if name not in have]
+        missing = [name for name in wanted if name not in have]
+
+        if not missing and not surplus:
             print(f"[INFO] Using {len(existing)} existing small files.")
             # Still update total size for report
-            total_size = sum(f.stat().st_size for f in existing)
-            self.results['config']['total_small_files_mb'] = round(total_size / 1024 / 1024, 2)
+            total_size = sum(size for _, size in existing)
+            cfg['total_small_files_mb'] = round(total_size / 1024 / 1024, 2)
+            self.small_entries = existing
             return small_dir
 
-        print(f"[SETUP] Generating {self.small_count} small files ({self.small_min_size/1024:.1f}KB - {self.small_max_size/1024:.1f}KB)...")
-        shutil.rmtree(small_dir, ignore_errors=True)
-        small_dir.mkdir()
-
-        total_gen_size = 0
-        for i in range(self.small_count):
-            size = random.randint(self.small_min_size, self.small_max_size)
-            self._generate_file(small_dir / f"small_{i}.bin", size)
-            total_gen_size += size
+        if surplus:
+            print(f"[SETUP] Removing {len(surplus)} small files not in the requested set...")
+            _unlink_all([small_dir / name for name in surplus])
+        if have:
+            print(f"[INFO] Reusing {len(have)} existing small files.")
+        if missing:
+            print(f"[SETUP] Generating {len(missing)} small files ({min_s/1024:.1f}KB - {max_s/1024:.1f}KB)...")
+
+        # One shared random pool; each file is a slice at a random offset so files still differ
+        pool = self._random_pool()
+        max_off = len(pool) - max_s
+        n = len(missing)
+        # Draw every size and offset up front rather than two randint calls per file
+        if _RNG is not None:
+            sizes = _RNG.integers(min_s, max_s + 1, size=n).tolist()
+            offsets = _RNG.integers(0, max_off + 1, size=n).tolist()
+        else:
+            sizes = random.choices(range(min_s, max_s + 1), k=n)
+            offsets = random.choices(range(max_off + 1), k=n)
+        entries = list(zip(missing, sizes))
+        if self.parallel_gen and entries:
+            # Fan the writes out across cores; local SSDs keep up with many concurrent writers
+            jobs = [(small_dir / name, size, off) for (name, size), off in zip(entries, offsets)]
+            cpus = os.cpu_count() or 1
+            # ~4 chunks per process: few enough to amortise IPC, enough to balance uneven file sizes
+            chunksize = max(1, len(jobs) // (cpus * 4))
+            with multiprocessing.Pool(cpus, initializer=_init_gen_worker, initargs=(bytes(pool),)) as procs:
+                for _ in procs.imap_unordered(_generate_file_worker, jobs, chunksize=chunksize):
+                    pass
+        else:
+            for (name, size), off in zip(entries, offsets):
+                _write_new_file(small_dir / name, pool[off:off + size])
+        have.update(entries)
+        total_gen_size = sum(have.values())
+        self.small_entries = list(have.items())
 
         print(f"[SETUP] Total small files size: {total_gen_size/1024/1024:.2f} MB")
-        self.results['config']['total_small_files_mb'] = round(total_gen_size / 1024 / 1024, 2)
+        cfg['total_small_files_mb'] = round(total_gen_size / 1024 / 1024, 2)
         return small_dir
 
+    def _copy_buffer(self, small=False):
+        """Returns this thread's reusable copy buffer of copy_bufsize bytes.
+
+        Small file copies get a separate buffer capped at the largest small file, so a big
+        --copy-bufsize-kb isn't allocated once per small file worker.
+        """
+        attr = 'small_buf' if small else 'buf'
+        buf = getattr(self._thread_bufs, attr, None)
+        if buf is None:
+            size = min(self.copy_bufsize, self.small_max_size) if small else self.copy_bufsize
+            if self.direct:
+                # Direct I/O needs page-aligned memory in whole blocks; anonymous mmaps are page-aligned
+                gran = mmap.ALLOCATIONGRANULARITY
+                buf = mmap.mmap(-1, -(-size // gran) * gran)
+            else:
+                buf = bytearray(size)
+            setattr(self._thread_bufs, attr, buf)
+        return buf
+
+    def _smb_channel(self):
+        """Returns this thread's extra smbclient arguments: with --multichannel, a connection cache of its own,
+        so each copy worker drives a separate TCP connection (and session) to the server; otherwise none.
+        """
+        if not self.multichannel:
+            return {}
+        cache = getattr(self._smb_local, 'cache', None)
+        if cache is None:
+            cache = self._smb_local.cache = {}
+            smbclient.register_session(_extract_server_from_path(self.smb_remote), username=self._smb_creds[0],
+                                       password=self._smb_creds[1], connection_cache=cache)
+            self._smb_caches.append(cache)
+        return {"connection_cache": cache}
+
+    def _connect_smb_channels(self):
+        """Opens every --multichannel connection up front (caller's and each worker's), so session setup isn't timed."""
+        self._smb_channel()
+        pool = self._large_executor()
+        if pool is not None:
+            # The barrier keeps each task busy until all workers exist, so every worker connects once
+            barrier = threading.Barrier(self.large_parallel)
+
+            def connect(_):
+                try:
+                    self._smb_channel()
+                except BaseException:
+                    barrier.abort()  # Release the workers already waiting instead of hanging them
+                    raise
+                try:
+                    barrier.wait()
+                except threading.BrokenBarrierError:
+                    pass  # Another worker failed to connect; map re-raises its error
+
+            list(pool.map(connect, range(self.large_parallel)))
+
+    def _large_executor(self):
+        """Returns the --large-parallel thread pool, or None when copies are single-stream."""
+        if self.large_parallel > 1 and self._large_pool is None:
+            # Kept for the whole run, so each worker's buffer is allocated once and reused by every copy
+            self._large_pool = ThreadPoolExecutor(max_workers=self.large_parallel)
+        return self._large_pool
+
+    def _copy_large(self, src, dst, nocache=False, hasher=None):
+        """Copies the large test file using the configured copy method (buffered when hashing or direct).
+
+        With large_parallel > 1 the file is copied as parts by that many threads instead (unless hashing or direct).
+        A UNC path string on either side (--smb-direct) is copied with smbprotocol instead of through the mount.
+        """
+        metadata = self.preserve_metadata
+        if _is_smb_path(src) or _is_smb_path(dst):
+            _smb_copy(src, dst, self.part_size, self.large_parallel, executor=self._large_executor(),
+                      get_buffer=self._copy_buffer, hasher=hasher, smb_kwargs=self._smb_channel)
+        elif self.large_parallel > 1 and hasher is None and not self.direct:
+            _parallel_copy(src, dst, self.part_size, self.large_parallel,
+                           executor=self._large_executor(), get_buffer=self._copy_buffer, nocache=nocache)
+            if metadata:
+                src_stat = os.stat(src)
+                os.utime(dst, (src_stat.st_atime, src_stat.st_mtime))
+        elif self.direct:
+            _fastcopy(src, dst, self.copy_bufsize, nocache, self._copy_buffer(), hasher, metadata, direct=True)
+        elif hasher is not None:
+            _fastcopy(src, dst, self.copy_bufsize, nocache, self._copy_buffer(), hasher, metadata)
+        elif self.copy_method == "native":
+            _platform_fastcopy(src, dst, self.copy_bufsize, nocache, metadata)
+        else:
+            _fastcopy(src, dst, self.copy_bufsize, nocache, self._copy_buffer(), metadata=metadata)
+
+    def _warmup_large(self, local_file, size=64 * 1024 * 1024):
+        """Copies the first `size` bytes of the large file to the target and back, untimed, through the same
+        copy path as the test, so one-time costs (session setup, TCP window growth, SMB credit ramp-up)
+        are paid before the timed upload."""
+        size = min(size, self.large_size)
+        local_warm = self.local_staging / "warmup_up.bin"
+        local_back = self.local_staging / "warmup_down.bin"
+        if self.smb_remote is not None:
+            remote_warm = f"{self.smb_remote}\\warmup.bin"
+        else:
+            remote_warm = self.remote_staging / "warmup.bin"
+
+        print(f"[SETUP] Warm-up: copying {size/1024/1024:.0f} MB to the target and back (untimed)...")
+        with open(local_file, 'rb') as f:
+            _write_new_file(local_warm, f.read(size))
+        try:
+            self._copy_large(local_warm, remote_warm)
+            self._copy_large(remote_warm, local_back)
+        finally:
+            local_warm.unlink(missing_ok=True)
+            local_back.unlink(missing_ok=True)
+            if self.smb_remote is not None:
+                smbclient.remove(remote_warm)
+            else:
+                remote_warm.unlink(missing_ok=True)
+
     def run_large_test(self, local_file):
         """Runs the large file test."""
         if not local_file: return
 
         print("\n--- Starting Large File Test (Throughput) ---")
-        remote_file = self.remote_staging / local_file.name
-        self.remote_staging.mkdir(parents=True, exist_ok=True)
+        if self.smb_remote is not None:
+            remote_file = f"{self.smb_remote}\\{local_file.name}"
+        else:
+            remote_file = self.remote_staging / local_file.name
+
+        if self.smb_remote is None and os.stat(self.remote_staging).st_dev == os.stat(self.local_staging).st_dev:
+            print("[WARN] Target is on the same filesystem as the local staging directory. "
+                  "Copies may be cloned or served from cache and will not reflect SMB performance (see --no-cache).")
+            self.results['config']['same_filesystem'] = True
+
+        if self.direct:
+            try:
+                _open_direct(local_file).close()
+                # Also evict it, so nothing served from cache can skew the upload
+                _evict_file(local_file)
+            except OSError as e:
+                print(f"[WARN] --direct: cannot bypass the cache for {local_file} ({e}); using cache hints instead.")
+                self.results['config']['direct'] = False
+
+        # Hash the bytes as they stream through each copy (verification forces the buffered copy)
+        up_hash = hashlib.blake2b() if self.verify else None
+        down_hash = hashlib.blake2b() if self.verify else None
+
+        if self.smb_remote is not None and self.multichannel:
+            self._connect_smb_channels()
+        if self.warmup:
+            self._warmup_large(local_file)
 
         # UPLOAD
-        print(f"Uploading {local_file.name} to {self.remote_staging}...")
-        start = time.perf_counter()
-        shutil.copy2(local_file, remote_file)
-        duration = time.perf_counter() - start
+        print(f"Uploading {local_file.name} to {self.smb_remote or self.remote_staging}...")
+        start_ns = time.perf_counter_ns()
+        self._copy_large(local_file, remote_file, hasher=up_hash)
+        duration_ns = time.perf_counter_ns() - start_ns
 
-        metrics = self._calculate_metrics(self.large_size, duration)
-        print(f"-> Upload: {metrics['seconds']}s | {metrics['MB_s']} MB/s ({metrics['mbps']} Mbps)")
+        metrics = self._calculate_metrics(self.large_size, duration_ns)
+        print(f"-> Upload: {metrics['seconds']:.3f}s | {metrics['MB_s']:.2f} MB/s ({metrics['mbps']:.2f} Mbps)")
         self.results['large_file']['upload'] = metrics
 
         # DOWNLOAD
@@ -261,75 +1154,444 @@ class SMBBenchmarker:
         local_temp = self.local_staging / f"download_temp_{uuid.uuid4()}.bin"
         print(f"Downloading back to local...")
 
-        if hasattr(os, 'sync'): os.sync()
+        # Flush only the uploaded file; a system-wide os.sync() could stall on unrelated dirty data.
+        # It stays cached, so this is the cached download and --no-cache adds the evicted one. --direct evicts it
+        # too, since the remote mount may refuse O_DIRECT and the copy then reads through the cache.
+        # smbprotocol keeps no client-side cache, so --smb-direct downloads always come from the server.
+        if self.smb_remote is None:
+            if self.direct:
+                _evict_file(remote_file)
+            else:
+                _flush_file(remote_file)
 
-        start = time.perf_counter()
-        shutil.copy2(remote_file, local_temp)
-        duration = time.perf_counter() - start
+        start_ns = time.perf_counter_ns()
+        self._copy_large(remote_file, local_temp, hasher=down_hash)
+        duration_ns = time.perf_counter_ns() - start_ns
 
-        metrics = self._calculate_metrics(self.large_size, duration)
-        print(f"-> Download: {metrics['seconds']}s | {metrics['MB_s']} MB/s ({metrics['mbps']} Mbps)")
+        metrics = self._calculate_metrics(self.large_size, duration_ns)
+        print(f"-> Download: {metrics['seconds']:.3f}s | {metrics['MB_s']:.2f} MB/s ({metrics['mbps']:.2f} Mbps)")
         self.results['large_file']['download'] = metrics
 
+        if self.verify:
+            match = up_hash.digest() == down_hash.digest()
+            self.results['large_file']['verify'] = {
+                "algorithm": "blake2b",
+                "upload": up_hash.hexdigest(),
+                "download": down_hash.hexdigest(),
+                "match": match
+            }
+            if match:
+                print("-> Verify: OK (upload and download checksums match)")
+            else:
+                print("[WARN] Verify: checksum MISMATCH between uploaded and downloaded data!")
+
+        # DOWNLOAD (uncached): evict the just-transferred file so the read has to go back to the server
+        if self.no_cache and self.smb_remote is not None:
+            print("[INFO] --no-cache: skipped with --smb-direct (smbprotocol reads always go to the server).")
+        elif self.no_cache:
+            if _evict_file(remote_file) or fcntl is not None and hasattr(fcntl, 'F_NOCACHE'):
+                start_ns = time.perf_counter_ns()
+                self._copy_large(remote_file, local_temp, nocache=True)
+                duration_ns = time.perf_counter_ns() - start_ns
+
+                metrics = self._calculate_metrics(self.large_size, duration_ns)
+                print(f"-> Download (uncached): {metrics['seconds']:.3f}s | {metrics['MB_s']:.2f} MB/s ({metrics['mbps']:.2f} Mbps)")
+                self.results['large_file']['download_uncached'] = metrics
+            else:
+                print("[WARN] --no-cache: page cache control is not supported on this platform, skipping uncached download.")
+
+        # Cleanup
+        local_temp.unlink(missing_ok=True)
+        if self.smb_remote is not None:
+            smbclient.remove(remote_file)
+        else:
+            remote_file.unlink(missing_ok=True)
+
+    def run_bufsize_sweep(self, local_file, sizes_kb=(64, 256, 1024, 4096, 16384)):
+        """Repeats the large file upload/download with the buffered copy at several buffer sizes."""
+        if not local_file: return
+
+        print("\n--- Starting Copy Buffer Size Sweep ---")
+        remote_file = self.remote_staging / f"sweep_{local_file.name}"
+        local_temp = self.local_staging / f"sweep_temp_{uuid.uuid4()}.bin"
+        sweep = {}
+
+        for size_kb in sizes_kb:
+            bufsize = size_kb * 1024
+            start_ns = time.perf_counter_ns()
+            _fastcopy(local_file, remote_file, bufsize, metadata=self.preserve_metadata)
+            up = self._calculate_metrics(self.large_size, time.perf_counter_ns() - start_ns)
+
+            # The download must come from the server rather than what this upload cached
+            _evict_file(remote_file)
+            start_ns = time.perf_counter_ns()
+            _fastcopy(remote_file, local_temp, bufsize, metadata=self.preserve_metadata)
+            down = self._calculate_metrics(self.large_size, time.perf_counter_ns() - start_ns)
+
+            print(f"-> {size_kb:>6} KB: Upload {up['MB_s']:.2f} MB/s | Download {down['MB_s']:.2f} MB/s")
+            sweep[str(size_kb)] = {"upload": up, "download": down}
+
+        self.results['large_file']['bufsize_sweep'] = sweep
+
         # Cleanup
         local_temp.unlink(missing_ok=True)
         remote_file.unlink(missing_ok=True)
 
+    def run_local_baseline(self, local_file):
+        """Copies the large file local-to-local in the kernel as a best-case reference for the SMB numbers."""
+        if not local_file: return
+
+        print("\n--- Starting Local Baseline (No Network) ---")
+        local_temp = self.local_staging / f"baseline_temp_{uuid.uuid4()}.bin"
+
+        try:
+            start_ns = time.perf_counter_ns()
+            method = _kernel_copy(local_file, local_temp)
+            duration_ns = time.perf_counter_ns() - start_ns
+        except OSError as e:
+            # Optional reference: don't let it end the run and lose the results already measured
+            print(f"[WARN] Local baseline copy failed: {e}")
+        else:
+            metrics = self._calculate_metrics(self.large_size, duration_ns)
+            print(f"-> Local copy ({method}): {metrics['seconds']:.3f}s | {metrics['MB_s']:.2f} MB/s ({metrics['mbps']:.2f} Mbps)")
+            self.results.setdefault('local_baseline', {}).update({"method": method, "large_file": metrics})
+        finally:
+            local_temp.unlink(missing_ok=True)
+
+    def run_local_small_baseline(self, local_dir):
+        """Hard-links the small file set into a local directory tree: per-file metadata cost with no data or network."""
+        if not local_dir: return
+
+        print("\n--- Starting Local Small File Baseline (Hard Links) ---")
+        link_dir = self.local_staging / "small_files_linked"
+        if link_dir.exists():
+            _fast_rmtree(link_dir)
+
+        try:
+            start_ns = time.perf_counter_ns()
+            shutil.copytree(local_dir, link_dir, copy_function=os.link)
+            duration_ns = time.perf_counter_ns() - start_ns
+        except (OSError, shutil.Error) as e:
+            print(f"[WARN] Hard-link baseline not supported on this filesystem: {e}")
+        else:
+            # No data moves, so only files_sec is meaningful
+            metrics = self._calculate_metrics(0, duration_ns, self.small_count)
+            print(f"-> Local links: {metrics['seconds']:.3f}s | {metrics['files_sec']:.1f} files/sec")
+            self.results.setdefault('local_baseline', {})['small_files'] = metrics
+        finally:
+            if link_dir.exists():
+                _fast_rmtree(link_dir)
+
+    def run_duplex_test(self, local_file):
+        """Runs the large file upload and download at the same time to measure full-duplex throughput."""
+        if not local_file: return
+
+        print("\n--- Starting Duplex Test (Simultaneous Upload + Download) ---")
+        remote_up = self.remote_staging / "duplex_up.bin"
+        remote_down = self.remote_staging / "duplex_down.bin"
+        local_temp = self.local_staging / f"duplex_temp_{uuid.uuid4()}.bin"
+
+        # Stage the file to download (untimed)
+        print("Staging remote copy for download...")
+        self._copy_large(local_file, remote_down)
+        # Staging went through this client, so evict it or the download leg is served from cache
+        if self.smb_remote is None:
+            _evict_file(remote_down)
+
+        print(f"Uploading and downloading {local_file.name} simultaneously...")
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            start_ns = time.perf_counter_ns()
+            futures = [
+                ex.submit(self._copy_large, local_file, remote_up),
+                ex.submit(self._copy_large, remote_down, local_temp),
+            ]
+            wait(futures, return_when=ALL_COMPLETED)
+            duration_ns = time.perf_counter_ns() - start_ns
+        for fut in futures:
+            fut.result()  # Re-raise any copy error
+
+        metrics = self._calculate_metrics(self.large_size * 2, duration_ns, 2)
+        print(f"-> Duplex: {metrics['seconds']:.3f}s | {metrics['MB_s']:.2f} MB/s combined ({metrics['mbps']:.2f} Mbps)")
+        self.results['duplex'] = metrics
+
+        # Cleanup
+        local_temp.unlink(missing_ok=True)
+        remote_up.unlink(missing_ok=True)
+        remote_down.unlink(missing_ok=True)
+
+    def _copy_files(self, files, src_dir, dst_dir, workers, file_times=None, executor=None):
+        """Copies the named files from src_dir to dst_dir with a thread pool (or in order when workers is 1). Returns elapsed nanoseconds.
+
+        If file_times is a list, each file's copy time in ns is appended to it (not for io_uring, which copies in batches).
+        Pass an executor to reuse its threads across calls instead of starting a pool inside the timed region.
+        With use_native_copy the whole of src_dir is copied by cp/robocopy instead, and no per-file times are recorded.
+        """
+        if self.use_native_copy:
+            return _native_copy_tree(src_dir, dst_dir, workers, metadata=self.preserve_metadata)
+        if workers > 1 and self.small_backend == "asyncio":
+            return asyncio.run(self._copy_files_async(files, src_dir, dst_dir, workers, file_times))
+        if workers > 1 and self.small_backend == "io_uring":
+            try:
+                return self._copy_files_uring(files, src_dir, dst_dir, workers)
+            except OSError as e:
+                print(f"[WARN] io_uring unavailable ({e}); falling back to the threads backend.")
+                self.small_backend = self.results['config']['small_backend'] = "threads"
+
+        # Open both directories once and resolve each file relative to them, so the redirector
+        # doesn't walk the full path for every file
+        src_fd, dst_fd = _open_dir(src_dir), _open_dir(dst_dir)
+        # Plain string paths, built before the clock starts (just the names when resolving via dir fds)
+        if src_fd is None:
+            src_s, dst_s = str(src_dir), str(dst_dir)
+            pairs = [(os.path.join(src_s, name), os.path.join(dst_s, name)) for name in files]
+        else:
+            pairs = [(name, name) for name in files]
+
+        def copy_one(pair):
+            # Raw copy with a per-thread buffer; skips copy2's extra stat/samefile/copystat round trips
+            t0 = time.perf_counter_ns()
+            _copy_data(pair[0], pair[1], self._copy_buffer(small=True), src_dir_fd=src_fd, dst_dir_fd=dst_fd)
+            if file_times is not None:
+                file_times.append(time.perf_counter_ns() - t0)  # list.append is atomic under the GIL
+
+        try:
+            start_ns = time.perf_counter_ns()
+            if workers == 1:
+                # True sequential baseline: no pool hand-off, whatever the backend
+                for pair in pairs:
+                    copy_one(pair)
+            else:
+                # Keep many SMB requests in flight so per-file round trips overlap
+                if executor is not None:
+                    list(executor.map(copy_one, pairs))
+                else:
+                    with ThreadPoolExecutor(max_workers=workers) as ex:
+                        list(ex.map(copy_one, pairs))
+            return time.perf_counter_ns() - start_ns
+        finally:
+            for fd in (src_fd, dst_fd):
+                if fd is not None:
+                    os.close(fd)
+
+    async def _copy_files_async(self, files, src_dir, dst_dir, workers, file_times=None):
+        """asyncio variant of _copy_files: one task per file, at most `workers` in flight."""
+        bufsize = min(self.copy_bufsize, self.small_max_size)
+        sem = asyncio.Semaphore(workers)
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=workers) if aiofiles is None else None
+        free_bufs = [bytearray(bufsize) for _ in range(workers)] if aiofiles is None else None
+
+        src_s, dst_s = str(src_dir), str(dst_dir)
+        pairs = [(os.path.join(src_s, name), os.path.join(dst_s, name)) for name in files]
+
+        async def copy_one(src, dst):
+            async with sem:
+                t0 = time.perf_counter_ns()
+                if aiofiles is not None:
+                    async with aiofiles.open(src, 'rb') as fsrc, aiofiles.open(dst, 'wb') as fdst:
+                        while True:
+                            chunk = await fsrc.read(bufsize)
+                            if not chunk:
+                                break
+                            await fdst.write(chunk)
+                else:
+                    buf = free_bufs.pop()
+                    try:
+                        await loop.run_in_executor(executor, _copy_data, src, dst, buf)
+                    finally:
+                        free_bufs.append(buf)
+                if file_times is not None:
+                    file_times.append(time.perf_counter_ns() - t0)
+
+        try:
+            start_ns = time.perf_counter_ns()
+            await asyncio.gather(*(copy_one(src, dst) for src, dst in pairs))
+            return time.perf_counter_ns() - start_ns
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def _copy_files_uring(self, files, src_dir, dst_dir, window=32):
+        """io_uring variant of _copy_files: submits opens, reads/writes and closes for a whole window
+        of files per syscall instead of one blocking chain per file. Returns elapsed nanoseconds.
+
+        window (the small file concurrency) is the number of files in flight; ~32 keeps completion
+        latency low, while much deeper queues mostly add variance.
+
+        Each file is read in one request into a buffer sized from the known file size; a short read
+        breaks the linked write, and any file that fails a step is redone with _copy_data.
+        """
+        sizes = dict(self.small_entries) if self.small_entries is not None else {}
+        ring, cqe = liburing.Ring(), liburing.Cqe()
+        liburing.io_uring_queue_init(window * 2, ring)  # Raises OSError if the kernel lacks io_uring
+
+        def run(ops):
+            # ops: (user_data, prep_fn, args, link). Submits the batch and returns {user_data: res}
+            for user_data, prep, args, link in ops:
+                sqe = liburing.io_uring_get_sqe(ring)
+                prep(sqe, *args)
+                sqe.user_data = user_data
+                if link:
+                    sqe.flags |= liburing.IOSQE_IO_LINK
+            liburing.io_uring_submit_and_wait(ring, len(ops))
+            res = {}
+            for _ in ops:
+                liburing.io_uring_wait_cqe(ring, cqe)
+                c = cqe[0]
+                res[c.user_data] = c.res
+                liburing.io_uring_cqe_seen(ring, c)
+            return res
+
+        wr_flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        # Path strings are built before the clock starts, and must stay referenced until the opens complete
+        src_s, dst_s = str(src_dir), str(dst_dir)
+        all_paths = [(os.path.join(src_s, n), os.path.join(dst_s, n)) for n in files]
+        try:
+            start_ns = time.perf_counter_ns()
+            for base in range(0, len(files), window):
+                names = files[base:base + window]
+                paths = all_paths[base:base + window]
+                bufs = [bytearray(sizes[n] if n in sizes else os.path.getsize(p[0])) for n, p in zip(names, paths)]
+
+                opened = run([op for i, (s, d) in enumerate(paths) for op in (
+                    (2 * i, liburing.io_uring_prep_open, (s, os.O_RDONLY, 0), False),
+                    (2 * i + 1, liburing.io_uring_prep_open, (d, wr_flags, 0o644), False))])
+                ok = [i for i in range(len(names)) if opened[2 * i] >= 0 and opened[2 * i + 1] >= 0]
+
+                done = run([op for i in ok if bufs[i] for op in (
+                    (2 * i, liburing.io_uring_prep_read, (opened[2 * i], bufs[i], 0), True),
+                    (2 * i + 1, liburing.io_uring_prep_write, (opened[2 * i + 1], bufs[i], 0), False))])
+
+                run([(k, liburing.io_uring_prep_close, (fd,), False) for k, fd in opened.items() if fd >= 0])
+
+                for i, (s, d) in enumerate(paths):
+                    if not bufs[i] and i in ok:
+                        continue
+                    if done.get(2 * i + 1) != len(bufs[i]):
+                        _copy_data(s, d, self._copy_buffer(small=True))
+            return time.perf_counter_ns() - start_ns
+        finally:
+            liburing.io_uring_queue_exit(ring)
+
     def run_small_test(self, local_dir):
         """Runs the small file test."""
         if not local_dir: return
 
         print("\n--- Starting Small File Test (Latency/Metadata) ---")
-        remote_dir = self.remote_staging / "small_files_remote"
-        remote_dir.mkdir(parents=True, exist_ok=True)
+        remote_dir = self.remote_small_dir
 
-        files = list(local_dir.glob("*.bin"))
-        total_size = sum(f.stat().st_size for f in files)
+        entries = self.small_entries if self.small_entries is not None else _scan_bin_files(local_dir)
+        files = [name for name, _ in entries]
+        total_size = sum(size for _, size in entries)
         file_count = len(files)
 
-        # UPLOAD
-        print(f"Uploading {file_count} files ({total_size/1024/1024:.2f} MB total)...")
-        start = time.perf_counter()
-        for f in files:
-            shutil.copy2(f, remote_dir / f.name)
-        duration = time.perf_counter() - start
+        def timed_copy(label, key, src_dir, dst_dir, workers):
+            file_times = []  # Per-file copy times (ns), for the latency distribution
+            duration_ns = self._copy_files(files, src_dir, dst_dir, workers, file_times, pool)
+            metrics = self._calculate_metrics(total_size, duration_ns, file_count)
+            line = f"-> {label}: {metrics['seconds']:.3f}s | {metrics['files_sec']:.1f} files/sec | {metrics['MB_s']:.2f} MB/s"
+            if file_times:
+                metrics['latency_ms'] = _latency_percentiles(file_times)
+                line += f" | p99 {metrics['latency_ms']['p99']} ms"
+            print(line)
+            self.results['small_files'][key] = metrics
+
+        def evict_remote():
+            # Untimed: the download should read from the server, not from what the upload left in the client cache.
+            # Several SMB round trips per file, so overlap them on the pool as _fast_rmtree does
+            paths = [remote_dir / name for name in files]
+            if pool is not None:
+                list(pool.map(_evict_file, paths))
+            else:
+                with ThreadPoolExecutor(max_workers=max(self.small_concurrency, 32)) as ex:
+                    list(ex.map(_evict_file, paths))
+
+        # One pool for every phase: its threads are reused instead of being started inside each timed copy
+        pool = None
+        if self.small_backend == "threads" and self.small_concurrency > 1 and not self.use_native_copy:
+            pool = ThreadPoolExecutor(max_workers=self.small_concurrency)
+            # Start every worker (and allocate its buffer) now; the barrier keeps each task busy so the pool spawns them all
+            barrier = threading.Barrier(self.small_concurrency)
+            list(pool.map(lambda _: (self._copy_buffer(small=True), barrier.wait()), range(self.small_concurrency)))
+        try:
+            # UPLOAD
+            print(f"Uploading {file_count} files ({total_size/1024/1024:.2f} MB total, {self.small_concurrency} concurrent)...")
+            timed_copy("Upload", 'upload', local_dir, remote_dir, self.small_concurrency)
+            if self.compare_concurrency:
+                timed_copy("Upload (sequential)", 'upload_sequential', local_dir, remote_dir, 1)
+
+            # DOWNLOAD
+            local_temp_dir = self.local_staging / "small_files_temp_down"
+            local_temp_dir.mkdir(exist_ok=True)
+
+            print(f"Downloading batch back to local...")
+            evict_remote()
+            timed_copy("Download", 'download', remote_dir, local_temp_dir, self.small_concurrency)
+            if self.compare_concurrency:
+                evict_remote()
+                timed_copy("Download (sequential)", 'download_sequential', remote_dir, local_temp_dir, 1)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        # Cleanup
+        _fast_rmtree(local_temp_dir)
+        _fast_rmtree(remote_dir)
 
-        metrics = self._calculate_metrics(total_size, duration, file_count)
-        print(f"-> Upload: {metrics['seconds']}s | {metrics['files_sec']} files/sec | {metrics['MB_s']} MB/s")
-        self.results['small_files']['upload'] = metrics
+    def run_small_test_archived(self, local_dir):
+        """Uploads the small file set as a single tar archive.
 
-        # DOWNLOAD
-        local_temp_dir = self.local_staging / "small_files_temp_down"
-        local_temp_dir.mkdir(exist_ok=True)
+        Comparing this with the per-file upload shows how much of the small file
+        time is per-file round trips rather than bandwidth.
+        """
+        if not local_dir: return
 
-        print(f"Downloading batch back to local...")
-        start = time.perf_counter()
-        for f in files:
-            shutil.copy2(remote_dir / f.name, local_temp_dir / f.name)
-        duration = time.perf_counter() - start
+        print("\n--- Starting Small File Archive Test (Single Transfer) ---")
+        local_tar = self.local_staging / "small_files.tar"
+        remote_tar = self.remote_staging / "small_files.tar"
+
+        # Build the archive (untimed) from the same file list as the per-file test, without re-walking the directory
+        entries = self.small_entries if self.small_entries is not None else _scan_bin_files(local_dir)
+        with tarfile.open(local_tar, 'w') as tf:
+            for name, _ in entries:
+                tf.add(local_dir / name, arcname=name)
+        tar_size = local_tar.stat().st_size
 
-        metrics = self._calculate_metrics(total_size, duration, file_count)
-        print(f"-> Download: {metrics['seconds']}s | {metrics['files_sec']} files/sec | {metrics['MB_s']} MB/s")
-        self.results['small_files']['download'] = metrics
+        print(f"Uploading {local_tar.name} ({tar_size/1024/1024:.2f} MB)...")
+        start_ns = time.perf_counter_ns()
+        self._copy_large(local_tar, remote_tar)
+        duration_ns = time.perf_counter_ns() - start_ns
+
+        metrics = self._calculate_metrics(tar_size, duration_ns, self.small_count)
+        print(f"-> Archive Upload: {metrics['seconds']:.3f}s | {metrics['files_sec']:.1f} files/sec | {metrics['MB_s']:.2f} MB/s")
+        self.results['small_files']['archive_upload'] = metrics
 
         # Cleanup
-        shutil.rmtree(local_temp_dir)
-        shutil.rmtree(remote_dir)
+        local_tar.unlink(missing_ok=True)
+        remote_tar.unlink(missing_ok=True)
 
     def cleanup_remote(self):
-        """Cleans up the remote staging directory."""
+        """Cleans up the remote staging directory (and stops the --large-parallel copy threads)."""
+        if self._large_pool is not None:
+            self._large_pool.shutdown()
+            self._large_pool = None
         try:
             if self.remote_staging.exists():
-                shutil.rmtree(self.remote_staging)
+                _fast_rmtree(self.remote_staging)
+            if self.smb_remote is not None:
+                smbclient.shutil.rmtree(self.smb_remote, ignore_errors=True)
+                for cache in self._smb_caches:
+                    smbclient.reset_connection_cache(fail_on_error=False, connection_cache=cache)
+                self._smb_caches.clear()
+                self._smb_local = threading.local()
         except Exception as e:
             print(f"[WARN] Could not fully clean remote directory: {e}")
 
     def save_report(self):
         """Saves the benchmark report to a JSON file."""
-        report_name = f"SMB_Report_{self.test_name}{self.batch_suffix}_{int(time.time())}.json"
+        report_name = f"SMB_Report_{self.test_name}{self.batch_suffix}_{time.time_ns() // 10**9}.json"
         report_file = self.report_dir / report_name
-        with open(report_file, 'w') as f:
-            json.dump(self.results, f, indent=4)
+        _write_json(report_file, _round_metrics(self.results), self.compact_json)
         print(f"\n[DONE] Detailed report saved to: {report_file}")
 
         print("\n" + "="*75)
@@ -342,31 +1604,101 @@ class SMBBenchmarker:
             print(f"TCP Latency ({lat['server']}:{lat['port']}): min={lat['min_ms']}ms | avg={lat['avg_ms']}ms | max={lat['max_ms']}ms")
             print("-" * 75)
 
+        large = self.results['large_file']
+        small = self.results['small_files']
+
         print(f"{'Metric':<20} | {'Upload':<25} | {'Download':<25}")
         print("-" * 75)
 
-        if 'upload' in self.results['large_file']:
-            l_up = self.results['large_file']['upload']
-            l_down = self.results['large_file']['download']
-            l_up_str = f"{l_up['MB_s']} MB/s ({l_up['mbps']} Mbps)"
-            l_down_str = f"{l_down['MB_s']} MB/s ({l_down['mbps']} Mbps)"
+        if 'upload' in large:
+            l_up = large['upload']
+            l_down = large['download']
+            l_up_str = f"{l_up['MB_s']:.2f} MB/s ({l_up['mbps']:.2f} Mbps)"
+            l_down_str = f"{l_down['MB_s']:.2f} MB/s ({l_down['mbps']:.2f} Mbps)"
             print(f"{'Large File Seq':<20} | {l_up_str:<25} | {l_down_str:<25}")
+            if 'download_uncached' in large:
+                l_nc = large['download_uncached']
+                l_nc_str = f"{l_nc['MB_s']:.2f} MB/s ({l_nc['mbps']:.2f} Mbps)"
+                print(f"{'  Uncached':<20} | {'-':<25} | {l_nc_str:<25}")
         else:
             print(f"{'Large File Seq':<20} | {'SKIPPED':<25} | {'SKIPPED':<25}")
 
+        if 'large_file' in self.results.get('local_baseline', {}):
+            base = self.results['local_baseline']['large_file']
+            base_str = f"{base['MB_s']:.2f} MB/s ({base['mbps']:.2f} Mbps) local only"
+            print(f"{'Local Baseline':<20} | {base_str}")
+
+        if self.results.get('duplex'):
+            dup = self.results['duplex']
+            dup_str = f"{dup['MB_s']:.2f} MB/s ({dup['mbps']:.2f} Mbps) combined"
+            print(f"{'Large File Duplex':<20} | {dup_str}")
+
         print("-" * 75)
 
-        if 'upload' in self.results['small_files']:
-            s_up = self.results['small_files']['upload']
-            s_down = self.results['small_files']['download']
-            s_up_str = f"{s_up['files_sec']} files/s ({s_up['MB_s']} MB/s)"
-            s_down_str = f"{s_down['files_sec']} files/s ({s_down['MB_s']} MB/s)"
+        if 'upload' in small:
+            s_up = small['upload']
+            s_down = small['download']
+            s_up_str = f"{s_up['files_sec']:.1f} files/s ({s_up['MB_s']:.2f} MB/s)"
+            s_down_str = f"{s_down['files_sec']:.1f} files/s ({s_down['MB_s']:.2f} MB/s)"
             print(f"{'Small File Rand':<20} | {s_up_str:<25} | {s_down_str:<25}")
+            if 'latency_ms' in s_up and 'latency_ms' in s_down:
+                s_up_p99 = f"{s_up['latency_ms']['p99']} ms"
+                s_down_p99 = f"{s_down['latency_ms']['p99']} ms"
+                print(f"{'  P99 per File':<20} | {s_up_p99:<25} | {s_down_p99:<25}")
+            if 'archive_upload' in small:
+                s_tar = small['archive_upload']
+                s_tar_str = f"{s_tar['files_sec']:.1f} files/s ({s_tar['MB_s']:.2f} MB/s)"
+                print(f"{'  As One Archive':<20} | {s_tar_str:<25} | {'-':<25}")
+            if 'small_files' in self.results.get('local_baseline', {}):
+                s_base = self.results['local_baseline']['small_files']
+                print(f"{'  Local Hard Links':<20} | {s_base['files_sec']:.1f} files/s local only")
         else:
             print(f"{'Small File Rand':<20} | {'SKIPPED':<25} | {'SKIPPED':<25}")
 
         print("="*75)
 
+def setup_tcp_tuning():
+    """Raises the OS TCP buffer limits so the SMB connection can fill high bandwidth-delay paths.
+
+    Needs root/admin. Returns a dict describing what was applied (or why not) for the report config.
+    """
+    if sys.platform.startswith('linux'):
+        settings = {
+            "net.core.rmem_max": "134217728",
+            "net.core.wmem_max": "134217728",
+            "net.ipv4.tcp_rmem": "4096 87380 67108864",
+            "net.ipv4.tcp_wmem": "4096 65536 67108864",
+        }
+        cmd = ["sysctl", "-w"] + [f"{key}={value}" for key, value in settings.items()]
+    elif os.name == 'nt':
+        settings = {"autotuninglevel": "experimental"}
+        cmd = ["netsh", "int", "tcp", "set", "global", "autotuninglevel=experimental"]
+    else:
+        print(f"[WARN] --tune-tcp is not supported on {sys.platform}; skipping.")
+        return {"applied": False, "error": f"unsupported platform: {sys.platform}"}
+
+    try:
+        subprocess.run(cmd, capture_output=True, text=True, timeout=30, check=True)
+    except subprocess.CalledProcessError as e:
+        error = (e.stderr or e.stdout or str(e)).strip()
+        print(f"[WARN] TCP tuning failed (requires root/admin): {error}")
+        return {"applied": False, "error": error}
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"[WARN] TCP tuning failed: {e}")
+        return {"applied": False, "error": str(e)}
+
+    for key, value in settings.items():
+        print(f"[SETUP] TCP tuning: {key} = {value}")
+    return {"applied": True, "settings": settings}
+
+def _summarize(values, metric):
+    """Returns the rounded average, min and max of values, keyed {metric}_avg/_min/_max."""
+    return {
+        f"{metric}_avg": round(sum(values) / len(values), 2),
+        f"{metric}_min": round(min(values), 2),
+        f"{metric}_max": round(max(values), 2),
+    }
+
 def calculate_aggregate_stats(all_results):
     """Calculate aggregate statistics from multiple test runs."""
     if not all_results:
@@ -393,27 +1725,16 @@ def calculate_aggregate_stats(all_results):
             "max_ms": round(max(r["max_ms"] for r in latency_results), 2),
         }
 
-    # Calculate stats for large file tests
-    if 'upload' in all_results[0]['large_file']:
+    # Calculate stats for large and small file tests
+    for category in ('large_file', 'small_files'):
+        if 'upload' not in all_results[0][category]:
+            continue
         for direction in ['upload', 'download']:
+            runs = [r[category][direction] for r in all_results]
             metrics = {}
             for metric in ['seconds', 'mbps', 'MB_s', 'MiB_s', 'files_sec']:
-                values = [r['large_file'][direction][metric] for r in all_results]
-                metrics[f"{metric}_avg"] = round(sum(values) / len(values), 2)
-                metrics[f"{metric}_min"] = round(min(values), 2)
-                metrics[f"{metric}_max"] = round(max(values), 2)
-            aggregate['large_file'][direction] = metrics
-
-    # Calculate stats for small file tests
-    if 'upload' in all_results[0]['small_files']:
-        for direction in ['upload', 'download']:
-            metrics = {}
-            for metric in ['seconds', 'mbps', 'MB_s', 'MiB_s', 'files_sec']:
-                values = [r['small_files'][direction][metric] for r in all_results]
-                metrics[f"{metric}_avg"] = round(sum(values) / len(values), 2)
-                metrics[f"{metric}_min"] = round(min(values), 2)
-                metrics[f"{metric}_max"] = round(max(values), 2)
-            aggregate['small_files'][direction] = metrics
+                metrics.update(_summarize([m[metric] for m in runs], metric))
+            aggregate[category][direction] = metrics
 
     return aggregate
 
@@ -431,13 +1752,16 @@ def print_aggregate_summary(aggregate, report_file):
     print(f"{'Metric':<20} | {'Upload':<25} | {'Download':<25}")
     print("-" * 75)
 
+    stats = (('  Average', 'avg'), ('  Min', 'min'), ('  Max', 'max'))
+
     if 'upload' in aggregate['large_file']:
         l_up = aggregate['large_file']['upload']
         l_down = aggregate['large_file']['download']
+        row = "{:<20} | {:.2f} MB/s ({:.2f} Mbps) | {:.2f} MB/s ({:.2f} Mbps)".format
         print(f"{'Large File Seq':<20} |")
-        print(f"{'  Average':<20} | {l_up['MB_s_avg']:.2f} MB/s ({l_up['mbps_avg']:.2f} Mbps) | {l_down['MB_s_avg']:.2f} MB/s ({l_down['mbps_avg']:.2f} Mbps)")
-        print(f"{'  Min':<20} | {l_up['MB_s_min']:.2f} MB/s ({l_up['mbps_min']:.2f} Mbps) | {l_down['MB_s_min']:.2f} MB/s ({l_down['mbps_min']:.2f} Mbps)")
-        print(f"{'  Max':<20} | {l_up['MB_s_max']:.2f} MB/s ({l_up['mbps_max']:.2f} Mbps) | {l_down['MB_s_max']:.2f} MB/s ({l_down['mbps_max']:.2f} Mbps)")
+        for label, stat in stats:
+            mb, mbps = f"MB_s_{stat}", f"mbps_{stat}"
+            print(row(label, l_up[mb], l_up[mbps], l_down[mb], l_down[mbps]))
     else:
         print(f"{'Large File Seq':<20} | {'SKIPPED':<25} | {'SKIPPED':<25}")
 
@@ -446,10 +1770,11 @@ def print_aggregate_summary(aggregate, report_file):
     if 'upload' in aggregate['small_files']:
         s_up = aggregate['small_files']['upload']
         s_down = aggregate['small_files']['download']
+        row = "{:<20} | {:.1f} files/s ({:.2f} MB/s) | {:.1f} files/s ({:.2f} MB/s)".format
         print(f"{'Small File Rand':<20} |")
-        print(f"{'  Average':<20} | {s_up['files_sec_avg']:.1f} files/s ({s_up['MB_s_avg']:.2f} MB/s) | {s_down['files_sec_avg']:.1f} files/s ({s_down['MB_s_avg']:.2f} MB/s)")
-        print(f"{'  Min':<20} | {s_up['files_sec_min']:.1f} files/s ({s_up['MB_s_min']:.2f} MB/s) | {s_down['files_sec_min']:.1f} files/s ({s_down['MB_s_min']:.2f} MB/s)")
-        print(f"{'  Max':<20} | {s_up['files_sec_max']:.1f} files/s ({s_up['MB_s_max']:.2f} MB/s) | {s_down['files_sec_max']:.1f} files/s ({s_down['MB_s_max']:.2f} MB/s)")
+        for label, stat in stats:
+            fs, mb = f"files_sec_{stat}", f"MB_s_{stat}"
+            print(row(label, s_up[fs], s_up[mb], s_down[fs], s_down[mb]))
     else:
         print(f"{'Small File Rand':<20} | {'SKIPPED':<25} | {'SKIPPED':<25}")
 
@@ -468,10 +1793,35 @@ def main():
     parser.add_argument("--small-count", type=int, default=500, help="Small file count")
     parser.add_argument("--small-min-kb", type=int, default=10, help="Min small file size (KB)")
     parser.add_argument("--small-max-kb", type=int, default=100, help="Max small file size (KB)")
+    parser.add_argument("--small-concurrency", type=int, default=32, help="Number of small files copied concurrently")
+    parser.add_argument("--small-backend", choices=["threads", "asyncio", "io_uring"], default="threads", help="Concurrency model for the small file test (asyncio uses aiofiles when installed; io_uring needs liburing on Linux)")
+    parser.add_argument("--use-native-copy", action="store_true", help="Copy the small file directory with a single cp (robocopy /MT on Windows) process instead of per-file Python copies")
+    parser.add_argument("--compare-concurrency", action="store_true", help="Also run the small file test sequentially and report both results")
+    parser.add_argument("--copy-method", choices=["native", "buffered"], default="native", help="Large file copy: platform zero-copy (CopyFileExW/copy_file_range, then sendfile/fcopyfile) or a Python buffered loop")
+    parser.add_argument("--large-parallel", type=int, default=1, help="Copy the large file as parts with this many threads (1 = single stream)")
+    parser.add_argument("--part-size-mb", type=int, default=16, help="Part size for --large-parallel (MB)")
+    parser.add_argument("--copy-bufsize-kb", type=int, default=_COPY_BUFSIZE // 1024, help="Buffer size for the buffered large file copy (KB)")
 
     # New flag
     parser.add_argument("--no-gen", action="store_true", help="Safe Mode: Do not generate or delete local source files. Use existing only.")
+    parser.add_argument("--parallel-gen", action="store_true", help="Generate the small files with one process per CPU core")
+    parser.add_argument("--secure-random", action="store_true", help="Generate test data with os.urandom instead of the faster non-cryptographic numpy PRNG (when numpy is installed)")
+    parser.add_argument("--duplex", action="store_true", help="Also run a large file upload and download simultaneously to measure full-duplex throughput")
+    parser.add_argument("--archive-test", action="store_true", help="Also upload the small files as a single tar archive to show the per-file overhead")
+    parser.add_argument("--preserve-metadata", action="store_true", help="Also copy timestamps after each large file copy, like shutil.copy2 (costs an SMB set-info round trip)")
+    parser.add_argument("--direct", action="store_true", help="Read the large file copy source with O_DIRECT / FILE_FLAG_NO_BUFFERING, bypassing the OS cache (uses the buffered copy)")
+    parser.add_argument("--verify", action="store_true", help="Checksum the large file during upload and download and compare (uses the buffered copy)")
+    parser.add_argument("--wire-chunk-report", action="store_true", help="Also repeat the large file test with the buffered copy at 64K/256K/1M/4M/16M buffers")
+    parser.add_argument("--local-baseline", action="store_true", help="Also time a local-to-local kernel copy of the large file and a hard-link tree of the small files as no-network references")
+    parser.add_argument("--no-cache", action="store_true", help="Also measure a large file download after evicting it from the page cache")
+    parser.add_argument("--tune-tcp", action="store_true", help="Raise OS TCP buffer limits before testing (sysctl on Linux, netsh on Windows; requires root/admin)")
+    parser.add_argument("--warmup", action="store_true", help="Copy 64 MB of the large file to the target and back (untimed) before the timed large file test")
+    parser.add_argument("--compact-json", action="store_true", help="Write JSON reports without indentation (smaller, faster to write and parse)")
     parser.add_argument("--batch", type=int, default=1, help="Number of times to run the test (default: 1)")
+    parser.add_argument("--smb-direct", metavar="URL", default=None, help="Copy the large file to/from smb://server/share/path with smbprotocol instead of through the mounted target")
+    parser.add_argument("--smb-user", default=None, help="Username for --smb-direct (default: Kerberos/current credentials)")
+    parser.add_argument("--smb-pass", default=None, help="Password for --smb-direct")
+    parser.add_argument("--multichannel", action="store_true", help="With --smb-direct, give each --large-parallel worker its own SMB connection; otherwise report whether the mount uses multichannel")
     parser.add_argument("--server", default=None, help="Server hostname or IP for TCP latency measurement (port 445). Auto-detected from UNC paths if not provided.")
 
     args = parser.parse_args()
@@ -480,18 +1830,42 @@ def main():
     if args.batch < 1:
         print("[ERROR] --batch must be >= 1")
         return
+    if args.small_concurrency < 1:
+        print("[ERROR] --small-concurrency must be >= 1")
+        return
+    if args.large_parallel < 1:
+        print("[ERROR] --large-parallel must be >= 1")
+        return
+    if args.part_size_mb < 1:
+        print("[ERROR] --part-size-mb must be >= 1")
+        return
+    if args.copy_bufsize_kb < 1:
+        print("[ERROR] --copy-bufsize-kb must be >= 1")
+        return
+    if args.smb_direct:
+        if smbclient is None:
+            print("[ERROR] --smb-direct requires smbprotocol (pip install smbprotocol)")
+            return
+        try:
+            _smb_unc(args.smb_direct)
+        except ValueError as e:
+            print(f"[ERROR] --smb-direct: {e}")
+            return
 
     print(f"Initializing SMB Bench: {args.name}")
     if args.no_gen: print("[MODE] NO-GENERATION (Using existing files only)")
     if args.batch > 1: print(f"[MODE] BATCH MODE: Running {args.batch} iterations")
 
     # Determine server for latency measurement
-    latency_server = args.server or _extract_server_from_path(args.target)
+    latency_server = (args.server or _extract_server_from_path(args.target)
+                      or (_extract_server_from_path(_smb_unc(args.smb_direct)) if args.smb_direct else None))
     if latency_server:
         print(f"[INFO] TCP latency target: {latency_server}:445")
     else:
         print("[INFO] No server detected for latency measurement (use --server to enable)")
 
+    tcp_tuning = setup_tcp_tuning() if args.tune_tcp else None
+
     all_results = []
     source_path = Path(args.source)
     report_dir = source_path / "smb_bench_reports"
@@ -505,19 +1879,47 @@ def main():
             print(f"BATCH RUN {run_num}/{args.batch}")
             print(f"{'='*75}")
 
-        bench = SMBBenchmarker(
-            args.target,
-            args.source,
-            args.name,
-            large_file_size_mb=args.large_mb,
-            small_file_count=args.small_count,
-            small_min_kb=args.small_min_kb,
-            small_max_kb=args.small_max_kb,
-            no_generation=args.no_gen,
-            batch_suffix=batch_suffix
-        )
+        try:
+            bench = SMBBenchmarker(
+                args.target,
+                args.source,
+                args.name,
+                large_file_size_mb=args.large_mb,
+                small_file_count=args.small_count,
+                small_min_kb=args.small_min_kb,
+                small_max_kb=args.small_max_kb,
+                no_generation=args.no_gen,
+                batch_suffix=batch_suffix,
+                copy_bufsize_kb=args.copy_bufsize_kb,
+                secure_random=args.secure_random,
+                small_concurrency=args.small_concurrency,
+                compare_concurrency=args.compare_concurrency,
+                copy_method=args.copy_method,
+                no_cache=args.no_cache,
+                compact_json=args.compact_json,
+                small_backend=args.small_backend,
+                verify=args.verify,
+                preserve_metadata=args.preserve_metadata,
+                direct=args.direct,
+                parallel_gen=args.parallel_gen,
+                large_parallel=args.large_parallel,
+                part_size_mb=args.part_size_mb,
+                use_native_copy=args.use_native_copy,
+                smb_direct=args.smb_direct,
+                smb_user=args.smb_user,
+                smb_pass=args.smb_pass,
+                multichannel=args.multichannel,
+                warmup=args.warmup
+            )
+        except OSError as e:
+            print(f"[ERROR] Could not prepare staging directories: {e}")
+            break
+
+        if tcp_tuning is not None:
+            bench.results['config']['tcp_tuning'] = tcp_tuning
 
         try:
+            bench.probe_mount_info()
             if latency_server:
                 bench.measure_latency(latency_server)
 
@@ -527,8 +1929,18 @@ def main():
             # Only run tests if setup (or finding files) was successful
             if large_file:
                 bench.run_large_test(large_file)
+                if args.wire_chunk_report:
+                    bench.run_bufsize_sweep(large_file)
+                if args.duplex:
+                    bench.run_duplex_test(large_file)
+                if args.local_baseline:
+                    bench.run_local_baseline(large_file)
             if small_dir:
                 bench.run_small_test(small_dir)
+                if args.archive_test:
+                    bench.run_small_test_archived(small_dir)
+                if args.local_baseline:
+                    bench.run_local_small_baseline(small_dir)
 
             bench.save_report()
             all_results.append(bench.results)
@@ -546,9 +1958,8 @@ def main():
     if args.batch > 1 and len(all_results) >= 1:
         aggregate = calculate_aggregate_stats(all_results)
         if aggregate:
-            aggregate_file = report_dir / f"SMB_Report_{args.name}_AGGREGATE_{int(time.time())}.json"
-            with open(aggregate_file, 'w') as f:
-                json.dump(aggregate, f, indent=4)
+            aggregate_file = report_dir / f"SMB_Report_{args.name}_AGGREGATE_{time.time_ns() // 10**9}.json"
+            _write_json(aggregate_file, aggregate, args.compact_json)
             print_aggregate_summary(aggregate, aggregate_file)
 
 if __name__ == "__main__":